@@ -0,0 +1,262 @@
+from artifact_tool import *
+
+import hashlib
+
+
+# columns that identify rows even when they hold floats
+IDENTIFIER_COLUMNS = ['location', 'sex', 'age', 'age_group_start', 'age_group_end', 'year', 'year_start',
+                      'year_end', 'parameter', 'cause', 'risk', 'draw']
+
+
+class ArtifactDiff():
+    """ Compares two versions of an artifact node by node.
+
+        Nodes present in only one artifact and nodes whose schema changed are
+        reported structurally. Nodes with matching schemas are streamed in
+        aligned chunks; a chunk whose hash matches on both sides is skipped, so
+        an unchanged table node is never materialized. For nodes that differ,
+        every value column is summarized across draws, as reduce_draws does,
+        in a second pass over the chunks. The means are accumulated chunk by
+        chunk, so memory stays bounded by the number of summary rows. The 2.5
+        and 97.5 percentiles need every draw of a row at once, so they are only
+        computed for nodes of at most max_summary_rows rows and are NaN above it.
+        Fixed format nodes can't be read partially and are always loaded whole.
+    """
+
+    def __init__(self, old_path, new_path, chunksize: int=100000, val_col=None,
+                 max_summary_rows: int=10000000):
+        """
+        Parameters
+        ----------
+        old_path, new_path:
+            The two artifacts to compare
+        chunksize:
+            The number of rows hashed and compared at once
+        val_col:
+            The value columns of each node, as a name, a list of names or a dict
+            from node path to either. By default every float column that isn't
+            in IDENTIFIER_COLUMNS is a value column. All other columns except
+            draw identify the rows.
+        max_summary_rows:
+            The largest node whose percentiles are summarized. None removes the
+            limit, 0 only summarizes means.
+        """
+        self.old = ArtifactTool(old_path)
+        self.new = ArtifactTool(new_path)
+        self.chunksize = chunksize
+        self.val_col = val_col
+        self.max_summary_rows = max_summary_rows
+        self._diff()
+
+    def _diff(self):
+        old_paths = set(self.old._table_paths)
+        new_paths = set(self.new._table_paths)
+
+        self.added = sorted(new_paths - old_paths)
+        self.removed = sorted(old_paths - new_paths)
+        self.schema_changed = {}
+        self.unchanged = []
+        self.summary_deltas = {}
+
+        changed = []
+        for path in sorted(old_paths & new_paths):
+            old_schema, old_chunks = self._read_node(self.old, path)
+            new_schema, new_chunks = self._read_node(self.new, path)
+            if old_schema != new_schema:
+                self.schema_changed[path] = (old_schema, new_schema)
+                continue
+
+            row = self._compare_chunks(path, old_chunks, new_chunks)
+            if row is None:
+                self.unchanged.append(path)
+                continue
+            val_cols = row.pop()
+            if not val_cols:
+                changed.append(row + [[], np.nan, np.nan, np.nan, np.nan])
+                continue
+
+            with_quantiles = self.max_summary_rows is None or old_schema[0] <= self.max_summary_rows
+            deltas = self._summary_deltas(old_chunks, new_chunks, val_cols, with_quantiles)
+            self.summary_deltas[path] = deltas
+            changed.append(row + self._summary_delta_row(deltas))
+
+        # the *_delta columns are the largest absolute change over the rows and
+        # value columns of the draw summary, the full changes are kept in
+        # summary_deltas with one row per summary row and value column
+        self.changed = pd.DataFrame(changed, columns=['path', 'chunks', 'chunks_changed', 'nan_changed',
+                                                      'max_abs_diff', 'columns_changed', 'rows_changed',
+                                                      'mean_delta', 'lower_delta', 'upper_delta'])
+
+    @property
+    def is_identical(self):
+        return not (self.added or self.removed or self.schema_changed or len(self.changed))
+
+    def _read_node(self, at, path):
+        """ Returns the row count, column dtypes and index names of a node
+            together with a function that iterates over its chunks. Table nodes
+            are only read one row at a time here; fixed format nodes can't be
+            read partially, so they are loaded once and reused.
+        """
+        storer = at._hdf.get_storer(path)
+        if storer.is_table:
+            head = _as_frame(at._hdf.select(path, start=0, stop=1))
+            n_rows = storer.nrows
+            chunks = lambda: (_as_frame(chunk) for chunk in at._hdf.select(path, chunksize=self.chunksize))
+        else:
+            node = _as_frame(at._hdf.get(path))
+            head = node
+            n_rows = len(node)
+            chunks = lambda: (node.iloc[start:start + self.chunksize]
+                              for start in range(0, len(node), self.chunksize))
+        schema = (n_rows, tuple((str(c), str(t)) for c, t in head.dtypes.items()),
+                  tuple(str(name) for name in head.index.names))
+        return schema, chunks
+
+    def _value_columns(self, path, table):
+        val_col = self.val_col.get(path) if isinstance(self.val_col, dict) else self.val_col
+        if val_col is not None:
+            val_cols = [val_col] if isinstance(val_col, str) else list(val_col)
+            return [c for c in val_cols if c in table.columns]
+        return [c for c in table.columns
+                if c not in IDENTIFIER_COLUMNS and pd.api.types.is_float_dtype(table[c])]
+
+    @staticmethod
+    def _hash_chunk(chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=True).values
+        return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+    def _compare_chunks(self, path, old_chunks, new_chunks):
+        """ Walks both versions of a node in lockstep. Returns None when every
+            chunk hashes identically, otherwise the number of changed chunks,
+            the number of values that became or stopped being NaN, the largest
+            absolute change of the other values and the value columns.
+        """
+        val_cols = None
+        n_chunks = 0
+        n_changed = 0
+        nan_changed = 0
+        max_abs_diff = np.nan
+
+        for old_chunk, new_chunk in zip(old_chunks(), new_chunks()):
+            n_chunks += 1
+            if val_cols is None:
+                val_cols = self._value_columns(path, old_chunk)
+            if self._hash_chunk(old_chunk) == self._hash_chunk(new_chunk):
+                continue
+
+            n_changed += 1
+            for val_col in val_cols:
+                old_values = old_chunk[val_col].values.astype(float)
+                new_values = new_chunk[val_col].values.astype(float)
+                old_nan = np.isnan(old_values)
+                new_nan = np.isnan(new_values)
+                nan_changed += int((old_nan != new_nan).sum())
+                both = ~(old_nan | new_nan)
+                if both.any():
+                    chunk_max = np.abs(new_values[both] - old_values[both]).max()
+                    max_abs_diff = chunk_max if np.isnan(max_abs_diff) else max(max_abs_diff, chunk_max)
+
+        if n_changed == 0:
+            return None
+
+        return [path, n_chunks, n_changed, nan_changed, max_abs_diff, val_cols]
+
+    def _summary_deltas(self, old_chunks, new_chunks, val_cols, with_quantiles):
+        """ Summarizes both versions of a node across draws and returns the
+            change of each summary row and value column.
+        """
+        old_summary = self._summarize(old_chunks, val_cols, with_quantiles)
+        new_summary = self._summarize(new_chunks, val_cols, with_quantiles)
+        deltas = old_summary.join(new_summary, how='outer', lsuffix='_old', rsuffix='_new')
+        for stat in ['value_mean', 'lower', 'upper']:
+            deltas[stat + '_delta'] = deltas[stat + '_new'] - deltas[stat + '_old']
+        return deltas
+
+    @staticmethod
+    def _summary_delta_row(deltas):
+        changed = deltas[['value_mean_delta', 'lower_delta', 'upper_delta']].abs().max(axis=1) > 0
+        # values that only exist, or are only NaN, in one version
+        changed |= deltas.value_mean_old.isnull() != deltas.value_mean_new.isnull()
+        changed_index = deltas.index[changed.values]
+        columns_changed = sorted(set(changed_index.get_level_values('column')))
+        rows_changed = len(changed_index.droplevel('column').unique())
+        row = [columns_changed, rows_changed]
+        for column in ['value_mean_delta', 'lower_delta', 'upper_delta']:
+            row.append(deltas[column].abs().max())
+        return row
+
+    def _summarize(self, chunks, val_cols, with_quantiles):
+        """ Returns the mean over draws of each value column for every row
+            identifier, accumulated over chunks, and the 2.5 and 97.5
+            percentiles if with_quantiles is set.
+        """
+        sums = None
+        counts = None
+        parts = []
+        offset = 0
+        for chunk in chunks():
+            chunk, identifiers = self._identified(chunk, val_cols, offset)
+            offset += len(chunk)
+            grouped = chunk.groupby(identifiers, dropna=False, observed=True)[val_cols]
+            chunk_sums, chunk_counts = grouped.sum(), grouped.count()
+            if sums is None:
+                sums, counts = chunk_sums, chunk_counts
+            else:
+                sums = sums.add(chunk_sums, fill_value=0)
+                counts = counts.add(chunk_counts, fill_value=0)
+            if with_quantiles:
+                parts.append(chunk[identifiers + val_cols])
+
+        means = sums / counts.where(counts > 0)
+        summary = pd.DataFrame({'value_mean': _stack(means)})
+        if with_quantiles:
+            grouped = pd.concat(parts).groupby(identifiers, dropna=False, observed=True)[val_cols]
+            summary['lower'] = _stack(grouped.quantile(0.025))
+            summary['upper'] = _stack(grouped.quantile(0.975))
+        else:
+            summary['lower'] = np.nan
+            summary['upper'] = np.nan
+        return summary
+
+    @staticmethod
+    def _identified(chunk, val_cols, offset):
+        """ Returns the chunk with its row identifiers as columns, and their names.
+            Named index levels and every column that is neither a value column
+            nor draw identify rows. Without any, a node with draws is summarized
+            as a whole and other rows are identified by position.
+        """
+        # an unnamed index is just a row number
+        if any(name is not None for name in chunk.index.names):
+            chunk = chunk.reset_index()
+        identifiers = [c for c in chunk.columns if c not in val_cols and c != 'draw']
+        if not identifiers:
+            if 'draw' in chunk.columns:
+                chunk = chunk.assign(row=0)
+            else:
+                chunk = chunk.assign(row=np.arange(offset, offset + len(chunk)))
+            identifiers = ['row']
+        return chunk, identifiers
+
+    def __str__(self):
+        diff_str = "OLD: " + self.old._path + "\n"
+        diff_str += "NEW: " + self.new._path + "\n"
+        diff_str += "---Added---\n"
+        diff_str += "".join(path + "\n" for path in self.added)
+        diff_str += "---Removed---\n"
+        diff_str += "".join(path + "\n" for path in self.removed)
+        diff_str += "---Schema Changed---\n"
+        diff_str += "".join(path + "\n" for path in self.schema_changed)
+        diff_str += "---Values Changed---\n"
+        diff_str += "".join(path + "\n" for path in self.changed.path)
+        return diff_str
+
+
+def _as_frame(table):
+    if isinstance(table, pd.Series):
+        return table.to_frame(table.name if table.name is not None else 'value')
+    return table
+
+
+def _stack(table):
+    table.columns.name = 'column'
+    return table.stack(dropna=False)
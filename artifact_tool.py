@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 
 import os.path
-from functools import lru_cache, partial
+import warnings
+from functools import lru_cache, partial, wraps
 from types import SimpleNamespace
 
 import vivarium_inputs as ceam_inputs
@@ -10,6 +11,26 @@ from gbd_mapping import covariates
 from vivarium_gbd_access import gbd
 
 
+def preview_lru_cache(maxsize: int=32):
+    """ An lru_cache for methods whose results depend on the draws that are
+        read. The preview state of the tool is part of the cache key, so
+        switching a tool in or out of preview mode neither returns results
+        computed from other draws nor evicts the results of other tools.
+    """
+    def decorator(func):
+        @lru_cache(maxsize=maxsize)
+        def cached(self, preview_key, *args, **kwargs):
+            return func(self, *args, **kwargs)
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            return cached(self, self._preview_key, *args, **kwargs)
+        wrapper.cache_clear = cached.cache_clear
+        wrapper.cache_info = cached.cache_info
+        return wrapper
+    return decorator
+
+
 class ArtifactTool():
 
     class _HDF_Path_Parser():
@@ -47,6 +68,10 @@ class ArtifactTool():
         self._path = path
         self._hdf = pd.HDFStore(path)
         self._str = None
+        self._preview_draws = None
+        self._preview_seed = 0
+        # nodes that had to be read whole in preview mode, see _get_table
+        self.preview_full_reads = set()
         self._parse_paths()
 
     def _parse_paths(self):
@@ -73,7 +98,101 @@ class ArtifactTool():
         self.tables = path_parser.to_namespace(self._get_table)
 
     def _get_table(self, path):
-        return self._hdf.get(path)
+        if self._preview_draws is None:
+            return self._hdf.get(path)
+
+        storer = self._hdf.get_storer(path)
+        if storer.is_table and 'draw' in (storer.data_columns or []):
+            # scan the draw column on its own and read the matching rows by
+            # coordinate so the other draws are never loaded
+            draw_column = self._hdf.select_column(path, 'draw')
+            coordinates = np.flatnonzero(draw_column.isin(self._preview_subset(draw_column)).values)
+            return self._hdf.select(path, where=coordinates)
+
+        # draws can only be filtered on read when they are a data column
+        table = self._hdf.get(path)
+        if 'draw' in table.columns:
+            if path not in self.preview_full_reads:
+                warnings.warn(path + " has no draw data column, so preview reads all of its draws")
+                self.preview_full_reads.add(path)
+            table = table[table.draw.isin(self._preview_subset(table.draw))]
+        return table
+
+    def preview(self, n_draws: int=100, seed: int=0):
+        """ Switches to preview mode. Tables with a draw column are read for a
+            deterministic subset of n_draws draws only, and reduce_draws
+            attaches standard errors for the statistics it computes.
+
+        Parameters
+        ----------
+        n_draws:
+            The number of draws to read from each table
+        seed:
+            Seeds the draw ordering. The same seed always selects the same draws
+            and a larger n_draws selects a superset of a smaller one.
+        """
+        assert n_draws > 0, "n_draws must be positive"
+        self._preview_seed = seed
+        self._preview_draws = n_draws
+
+    def refine(self, n_draws: int=None):
+        """ Adds draws to the preview subset, doubling it unless n_draws is given.
+        """
+        assert self._preview_draws is not None, "refine requires preview mode"
+        assert n_draws is None or n_draws >= self._preview_draws, "refine can't remove draws"
+        self.preview(n_draws or 2 * self._preview_draws, self._preview_seed)
+
+    def full(self):
+        """ Leaves preview mode so tables are read with all of their draws.
+        """
+        self._preview_draws = None
+
+    @property
+    def in_preview(self):
+        return self._preview_draws is not None
+
+    @property
+    def _preview_key(self):
+        if self._preview_draws is None:
+            return None
+        return self._preview_draws, self._preview_seed
+
+    def _preview_subset(self, draws: pd.Series):
+        """ Returns the draws of a table read in preview mode. They only depend
+            on the seed and the draws the table has, not on what was read before.
+        """
+        order = np.random.RandomState(self._preview_seed).permutation(np.sort(draws.unique()))
+        return order[:self._preview_draws]
+
+    def _draw_errors(self, values: np.ndarray, n_bootstrap: int=100):
+        """ Estimates the sampling error of the draw summaries in preview mode.
+
+        Parameters
+        ----------
+        values:
+            An array with draws as rows and identifiers as columns
+        n_bootstrap:
+            The number of bootstrap resamples used for the percentiles
+
+        Returns
+        -------
+        The standard errors of the mean, the 2.5th and the 97.5th percentiles,
+        one array entry per identifier. The mean uses the analytic estimate,
+        the percentiles a bootstrap over draws.
+        """
+        n_draws = values.shape[0]
+        if n_draws < 2:
+            nans = np.full(values.shape[1], np.nan)
+            return nans, nans, nans
+        mean_se = values.std(axis=0, ddof=1) / np.sqrt(n_draws)
+
+        random = np.random.RandomState(self._preview_seed)
+        lower = np.empty((n_bootstrap, values.shape[1]))
+        upper = np.empty((n_bootstrap, values.shape[1]))
+        for i in range(n_bootstrap):
+            sample = values[random.randint(0, n_draws, n_draws)]
+            lower[i], upper[i] = np.percentile(sample, [2.5, 97.5], axis=0)
+        return mean_se, lower.std(axis=0, ddof=1), upper.std(axis=0, ddof=1)
 
     def __str__(self):
         return self._str
@@ -3,11 +3,11 @@ from gbd_mapping import covariates
 
 class BFP_ArtifactTool(GBD_ArtifactTool):
 
-    def __init__(self, path):
-        super().__init__(path)
+    def __init__(self, path, backend=gbd):
+        super().__init__(path, backend)
         self._bfp_parse_paths()
         self._country = self._hdf.get("/dimensions/full_space").location.loc[0]
-        self._gbd_location_id = int(gbd.get_location_ids().query('location_name == "' + self._country + '"').location_id)
+        self._gbd_location_id = int(backend.get_location_ids().query('location_name == "' + self._country + '"').location_id)
         self.covariates = self._bfp_covariates()
 
     def _bfp_parse_paths(self):
@@ -29,19 +29,34 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
 
     def _bfp_covariates(self):
         covars = covariates.to_dict()
-        covars = {c: partial(gbd.get_covariate_estimates, [covars[c]['gbd_id']], self._gbd_location_id) for c in covars}
+        covars = {c: partial(self._backend.get_covariate_estimates, [covars[c]['gbd_id']], self._gbd_location_id) for c in covars}
         return SimpleNamespace(**covars)
 
+    def get_covariates(self, names: list, location_ids: list=None, year_ids: list=None, max_workers: int=16,
+                       backend=None):
+        """ Fetches several covariates concurrently, for the artifact's location
+            unless location_ids are given. See GBD_ArtifactTool.get_covariates.
+        """
+        if location_ids is None:
+            location_ids = [self._gbd_location_id]
+        return super().get_covariates(names, location_ids, year_ids, max_workers, backend)
+
     @property
     def location(self):
         return self._country
 
-    @lru_cache(maxsize=32)
+    @property
+    def location_id(self):
+        return self._gbd_location_id
+
+    @preview_lru_cache(maxsize=32)
     def deaths_for_year_with_age_limit(self, year: int=2016, lower: float=0, upper: float=5):
         table = self._get_table_for_year_with_age_limit('/cause/all_causes/death', year, lower, upper)
-        return table.value.sum() / 1000 / 2
+        # the deaths are summed over draws, average them over the draws read
+        n_draws = max(table.draw.nunique(), 1) if 'draw' in table.columns else 1000
+        return table.value.sum() / n_draws / 2
 
-    @lru_cache(maxsize=32)
+    @preview_lru_cache(maxsize=32)
     def deaths_for_year(self, year: int =2016):
         return self.deaths_for_year_with_age_limit(year, 0, 1000)
 
@@ -57,13 +72,13 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         population_size = self.population_for_year(year)
         return live_birth_rate / population_size * 1000
 
-    @lru_cache(maxsize=32)
+    @preview_lru_cache(maxsize=32)
     def child_mortality_rate_for_year(self, year: int =2016):
         deaths_under_5 = self.deaths_for_year_with_age_limit(year, 0, 5)
         live_birth_rate = self.live_births_for_year(year)
         return deaths_under_5 / live_birth_rate * 1000
 
-    @lru_cache(maxsize=32)
+    @preview_lru_cache(maxsize=32)
     def exposure_rates_by_year_with_age_limit(self, risk_factor: str, year: int=2016, lower: int=0, upper: int=5):
         assert risk_factor in self._risks, "risk_factor is not in the Artifact"
 
@@ -90,9 +105,13 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results['exposure_rate'] = [numerator[i] / denominator[i] for i in range(len(numerator))]
         results['exposure_rate_lower'] = [numerator_lower[i] / denominator[i] for i in range(len(numerator))]
         results['exposure_rate_upper'] = [numerator_upper[i] / denominator[i] for i in range(len(numerator))]
+        if self.in_preview:
+            results['exposure_rate_se'] = self._weighted_se(table, groups)
+            results['exposure_rate_lower_se'] = self._weighted_se(table, groups, 'lower_se')
+            results['exposure_rate_upper_se'] = self._weighted_se(table, groups, 'upper_se')
         return results
 
-    @lru_cache(maxsize=32)
+    @preview_lru_cache(maxsize=32)
     def relative_risk_by_year_with_age_limit(self, risk_factor: str, year: int=2016, lower: float=0, upper: float=5):
         assert risk_factor in self._risks, "risk_factor is not in the Artifact"
 
@@ -121,6 +140,10 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results['relative_risk'] = [numerator[i] / denominator[i] for i in range(len(numerator))]
         results['relative_risk_lower'] = [numerator_lower[i] / denominator[i] for i in range(len(numerator))]
         results['relative_risk_upper'] = [numerator_upper[i] / denominator[i] for i in range(len(numerator))]
+        if self.in_preview:
+            results['relative_risk_se'] = self._weighted_se(table, groups)
+            results['relative_risk_lower_se'] = self._weighted_se(table, groups, 'lower_se')
+            results['relative_risk_upper_se'] = self._weighted_se(table, groups, 'upper_se')
         return results
 
     def SEV_for_year_with_age_limit(self, risk_factor: str, year: int=2016, lower: float=0, upper: float=5):
@@ -160,6 +183,23 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results['risk'] = [risk_factor] * n_rows
         results['cause'] = list(groups.keys())
         results['SEV'] = [numerator[i] / denominator[i] for i in range(len(numerator))]
+        if self.in_preview:
+            # delta method: SEV = (S - 1) / (RR_max - 1) with S = sum(RR * exposure).
+            # The maximal relative risk is also a term of S, so its gradient
+            # combines both. This is a heuristic bound rather than an estimate:
+            # the input errors come from _weighted_se, which adds errors
+            # linearly and so already overstates them, and the exposures are
+            # treated as independent although they sum to one.
+            table['exposure_se'] = exposure_table.exposure_rate_se.tolist() * len(rr_table.cause.unique())
+            sev_se = []
+            for i, cause in enumerate(groups):
+                group = table.loc[groups[cause]]
+                rr_gradient = group.exposure / denominator[i]
+                rr_gradient[group.relative_risk.idxmax()] -= numerator[i] / denominator[i] ** 2
+                exposure_gradient = group.relative_risk / denominator[i]
+                sev_se.append(np.sqrt(((rr_gradient * group.relative_risk_se) ** 2).sum()
+                                      + ((exposure_gradient * group.exposure_se) ** 2).sum()))
+            results['SEV_se'] = sev_se
         return results
 
     def SEV_all_risk_factors_for_year_with_age_limit(self, year: int=2016, lower: float=0, upper: float=5):
@@ -175,7 +215,7 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         exp_table = self.exposure_rates_by_year_with_age_limit(risk_factor, year, lower, upper)
         rr_table = self.relative_risk_by_year_with_age_limit(risk_factor, year, lower, upper)
 
-        table = rr_table
+        table = rr_table.copy()
         table['exposure_rate'] = exp_table.exposure_rate.tolist() * len(rr_table.cause.unique())
 
         product = table.exposure_rate * table.relative_risk
@@ -187,6 +227,12 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results['cause'] = table.cause.unique()
         results['risk'] = [risk_factor] * len(results.cause)
         results['PAF'] = paf
+        if self.in_preview:
+            # delta method: PAF = 1 - 1 / S with S = sum(RR * exposure), a
+            # heuristic bound for the same reasons as SEV_se
+            table['exposure_rate_se'] = exp_table.exposure_rate_se.tolist() * len(rr_table.cause.unique())
+            sum_se = self._product_sum_se(table, 'exposure_rate', 'exposure_rate_se', groups)
+            results['PAF_se'] = [sum_se[i] / product[groups[cause]].sum() ** 2 for i, cause in enumerate(groups)]
         return results
 
     def PAF_all_risks_for_year_with_age_limit(self, year: int=2016, lower: float=0, upper: float=5):
@@ -208,6 +254,8 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results = self._default_result_table(year, n_rows)
         results['cause'] = [cause] * n_rows
         results['CSMR'] = [(table.value_mean * table.population).sum() / table.population.sum()]
+        if self.in_preview:
+            results['CSMR_se'] = self._weighted_se(table)
         return results
 
     def CSMR_all_causes_for_year_with_age_limit(self, year: int=2016, lower: float=0, upper: float=5):
@@ -230,6 +278,8 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         results = self._default_result_table(year, n_rows)
         results['cause'] = [cause] * n_rows
         results['incidence'] = [(table.value_mean * table.population).sum() / table.population.sum()]
+        if self.in_preview:
+            results['incidence_se'] = self._weighted_se(table)
         return results
 
     def incidence_all_causes_for_year_with_age_limit(self, year: int=2016, lower: float=0, upper: float=5):
@@ -258,11 +308,13 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
 
         Returns
         -------
-        A table that summarizes key statistical values for a specific column
+        A table that summarizes key statistical values for a specific column. In
+        preview mode each statistic gets a matching "_se" column.
         """
         assert "draw" in table.columns, "Table does not have a column named draw"
 
-        drawless_table = table.query('draw == 0')
+        # draw 0 is not necessarily read in preview mode
+        drawless_table = table[table.draw == table.draw.min()]
 
         # create identifiers for each row, independent of draws
         columns = drawless_table.columns.tolist()
@@ -287,6 +339,11 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         result_df[val_col + "_mean"] = [value_df[col].values.mean() for col in identifiers]
         result_df['lower'] = [np.percentile(value_df[col].values, 2.5) for col in identifiers]
         result_df['upper'] = [np.percentile(value_df[col].values, 97.5) for col in identifiers]
+        if self.in_preview:
+            mean_se, lower_se, upper_se = self._draw_errors(values)
+            result_df[val_col + "_mean_se"] = mean_se
+            result_df['lower_se'] = lower_se
+            result_df['upper_se'] = upper_se
         result_df = result_df.reset_index(drop=True)
 
         return result_df
@@ -345,12 +402,45 @@ class BFP_ArtifactTool(GBD_ArtifactTool):
         """
         assert path in self._table_paths, "The table: " + str(path) + " does not exist in the hdf: " + str(self._path)
 
-        table = self._hdf.get(path)
+        table = self._get_table(path)
         table = table[table.year == year]
         table = table[table.age <= upper]
         table = table[table.age >= lower]
         return table
 
+    def _weighted_se(self, table: pd.DataFrame, groups: dict=None, se_col: str="value_mean_se"):
+        """ Bounds the standard error of population weighted means of a statistic.
+
+        Parameters
+        ----------
+        table:
+            A reduced table with a "population" column and the se_col column
+        groups:
+            A mapping from group keys to row labels, as given by groupby().groups.
+            If None the whole table is a single group.
+        se_col:
+            The standard errors of the statistic, as computed by reduce_draws
+
+        Returns
+        -------
+        A list with one standard error per group. Draw errors across rows are
+        correlated, so the errors are added linearly, which can only overstate
+        the error of the weighted mean.
+        """
+        weighted_se = table[se_col] * table.population
+        if groups is None:
+            return [weighted_se.sum() / table.population.sum()]
+        return [weighted_se[groups[key]].sum() / table.population[groups[key]].sum() for key in groups]
+
+    def _product_sum_se(self, table: pd.DataFrame, exposure_col: str, exposure_se_col: str, groups: dict):
+        """ Returns the standard error of sum(relative_risk * exposure) within each
+            group to first order, treating the relative risks and exposures as
+            independent.
+        """
+        variance = ((table[exposure_col] * table.relative_risk_se) ** 2
+                    + (table.relative_risk * table[exposure_se_col]) ** 2)
+        return [np.sqrt(variance[groups[key]].sum()) for key in groups]
+
     def _default_result_table(self, year, n_rows):
         """ Returns a default results table used to format results.
 
@@ -1,50 +1,31 @@
 import pandas as pd
-import numpy as np
-
-from sklearn import preprocessing
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-from sklearn.cluster import AgglomerativeClustering, DBSCAN, KMeans
 
 import matplotlib.pyplot as plt
 # %matplotlib inline
 
+from clustering import CountryClustering
+
 folder = '/Volumes/IHME/projects/artifact_tool/'
 table_name = 'table.csv'
 plot_name = 'cluster'
 
-# Load the table and clean the data
-table = pd.read_csv(folder + table_name)
-countries = table.columns.tolist()[1:]
-table.columns = ["Features"] + countries
-countries = table.columns.tolist()[1:]
-features = table.Features.tolist()
-table.index = table.Features
-table = table.drop(columns=['Features'])
-
-# Since our populations vary so much take the log of each feature that
-# uses population
-table.loc['population'] = np.log(table.loc['population'])
-table.loc['population under 5'] = np.log(table.loc['population under 5'])
-
-# Standardize the data
-data = table.transpose().values[0:]
-data = preprocessing.scale(data)
-
-# Reduce the number of dimensions with TSNE.
-n_comp = 2
+n_clusters = 7
 perplexity = 8
-tsne = TSNE(n_components=n_comp, perplexity=perplexity)
-data_cluster = tsne.fit_transform(X=data)
 
-# Standardize the output of the reduced data
-data_cluster = preprocessing.scale(data_cluster)
+# Load the table. The log of the population features is taken and the data is
+# standardized inside CountryClustering
+clustering = CountryClustering.from_csv(folder + table_name, cache_dir=folder)
+countries = clustering.locations
 
-# Cluser using an agglormerative method
-n_clusters = 7
-model = AgglomerativeClustering(n_clusters=n_clusters)
-model.fit(data_cluster)
-clusters = model.labels_
+# Score a range of parameters around the defaults to see how robust they are
+scores = clustering.sweep(perplexities=[5, perplexity, 12], algorithms=['agglomerative', 'kmeans'],
+                          n_clusters=range(4, 11))
+scores.to_csv(folder + plot_name + '_scores.csv', index=False)
+print(scores.sort_values(by=['silhouette'], ascending=False).head(10))
+
+# Reduce the number of dimensions with TSNE and cluser using an agglormerative method
+data_cluster = clustering.embed(perplexity=perplexity)
+clusters = clustering.cluster('agglomerative', perplexity=perplexity, n_clusters=n_clusters)
 
 # Save images of the clustering
 plt.figure(1)
@@ -0,0 +1,255 @@
+import pandas as pd
+import numpy as np
+
+import os.path
+import hashlib
+import itertools
+import json
+
+from joblib import Parallel, delayed
+from sklearn import preprocessing
+from sklearn.decomposition import PCA
+from sklearn.manifold import TSNE
+from sklearn.cluster import AgglomerativeClustering, DBSCAN, KMeans
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+
+ALGORITHMS = {
+    'agglomerative': AgglomerativeClustering,
+    'kmeans': KMeans,
+    'dbscan': DBSCAN,
+}
+
+
+class CountryClustering():
+    """ Clusters locations on a feature table like the one written by
+        generate_table.py, with features as rows and locations as columns.
+
+        The standardized feature matrix and every embedding are cached, in
+        memory and optionally in cache_dir, under a hash of the data and the
+        parameters that produced them, so a parameter sweep only computes each
+        embedding once.
+    """
+
+    def __init__(self, table: pd.DataFrame, log_features: tuple=('population', 'population under 5'),
+                 cache_dir: str=None, n_jobs: int=-1):
+        self.table = table
+        self.locations = table.columns.tolist()
+        self.log_features = [f for f in log_features if f in table.index]
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self._features = None
+        self._embeddings = {}
+
+        hashes = pd.util.hash_pandas_object(table.reset_index(), index=False).values
+        self._data_hash = hashlib.sha1(hashes.tobytes() + str(self.log_features).encode()).hexdigest()
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs):
+        """ Loads a feature table saved by generate_table.py.
+        """
+        table = pd.read_csv(path, index_col=0)
+        table.index.name = "Features"
+        return cls(table, **kwargs)
+
+    @property
+    def features(self):
+        """ The standardized feature matrix, with locations as rows.
+        """
+        if self._features is None:
+            self._features = self._cached('features', {}, self._standardize)
+        return self._features
+
+    def _standardize(self):
+        table = self.table.astype(float)
+        # Since our populations vary so much take the log of each feature that
+        # uses population
+        for feature in self.log_features:
+            table.loc[feature] = np.log(table.loc[feature])
+        return preprocessing.scale(table.transpose().values)
+
+    def embed(self, perplexity: float=8, pca_components: int=None, n_components: int=2, random_state: int=0):
+        """ Reduces the standardized features with t-SNE. Its cost grows with the
+            number of locations, and the Barnes-Hut approximation keeps it at
+            O(n log n), so an embedding of 3000 locations takes about 20 seconds
+            on a single core. Barnes-Hut limits n_components to at most 3.
+
+        Parameters
+        ----------
+        perplexity:
+            The t-SNE perplexity. It must be smaller than the number of locations.
+        pca_components:
+            If given, the features are first reduced to this many principal
+            components. This only shrinks the feature dimension, to denoise
+            tables with many features; it does little for the run time.
+        n_components:
+            The dimension of the embedding
+        random_state:
+            Seeds t-SNE so embeddings are reproducible and can be cached
+
+        Returns
+        -------
+        A standardized array with one row per location.
+        """
+        params = self._embedding_params(perplexity, pca_components, n_components, random_state)
+        key = self._key('embedding', params)
+        if key not in self._embeddings:
+            self._embeddings[key] = self._cached('embedding', params, _TSNE_Embedding(self.features, params))
+        return self._embeddings[key]
+
+    def cluster(self, algorithm: str='agglomerative', perplexity: float=8, pca_components: int=None,
+                random_state: int=0, **params):
+        """ Clusters an embedding of the features.
+
+        Parameters
+        ----------
+        algorithm:
+            One of "agglomerative", "kmeans" or "dbscan"
+        perplexity, pca_components, random_state:
+            Select the embedding, see embed
+        params:
+            Passed on to the clustering model, e.g. n_clusters or eps
+
+        Returns
+        -------
+        An array with the cluster label of each location. DBSCAN labels noise as -1.
+        """
+        embedding = self.embed(perplexity, pca_components, random_state=random_state)
+        return _fit_labels(embedding, algorithm, params, random_state)
+
+    def sweep(self, perplexities: list=(8,), algorithms: list=('agglomerative',), n_clusters: list=(7,),
+              eps: list=(0.5,), pca_components: list=(None,), n_stability: int=10, random_state: int=0):
+        """ Clusters every combination of the given parameters in parallel and
+            scores each result.
+
+        Parameters
+        ----------
+        perplexities, pca_components:
+            The embeddings to cluster, see embed
+        algorithms:
+            The clustering algorithms to run, see cluster
+        n_clusters:
+            The cluster counts tried by agglomerative and kmeans
+        eps:
+            The neighbourhood sizes tried by dbscan
+        n_stability:
+            The number of subsamples used to score stability. 0 skips it.
+        random_state:
+            Seeds the embeddings, the models and the subsamples
+
+        Returns
+        -------
+        A table with one row per parameter combination with its silhouette score
+        and its stability, the mean adjusted Rand index between the clustering of
+        an 80% subsample of locations and the full clustering of those locations.
+        """
+        embedding_params = [self._embedding_params(p, c, 2, random_state)
+                            for p, c in itertools.product(perplexities, pca_components)]
+
+        # compute the missing embeddings first so the clustering jobs share them
+        missing = {self._key('embedding', params): params for params in embedding_params}
+        missing = [params for key, params in missing.items() if key not in self._embeddings]
+        for params, embedding in zip(missing, Parallel(n_jobs=self.n_jobs)(
+                delayed(self._cached)('embedding', params, _TSNE_Embedding(self.features, params))
+                for params in missing)):
+            self._embeddings[self._key('embedding', params)] = embedding
+
+        jobs = []
+        for params in embedding_params:
+            for algorithm in algorithms:
+                if algorithm == 'dbscan':
+                    model_params = [{'eps': e} for e in eps]
+                else:
+                    model_params = [{'n_clusters': n} for n in n_clusters]
+                for model_param in model_params:
+                    jobs.append((params, algorithm, model_param))
+
+        scores = Parallel(n_jobs=self.n_jobs)(
+            delayed(_score)(self._embeddings[self._key('embedding', params)], algorithm, model_param,
+                            n_stability, random_state)
+            for params, algorithm, model_param in jobs)
+
+        rows = []
+        for (params, algorithm, model_param), score in zip(jobs, scores):
+            row = {'algorithm': algorithm,
+                   'perplexity': params['perplexity'],
+                   'pca_components': params['pca_components'],
+                   'n_clusters': model_param.get('n_clusters', np.nan),
+                   'eps': model_param.get('eps', np.nan)}
+            row.update(score)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def _embedding_params(self, perplexity, pca_components, n_components, random_state):
+        assert perplexity < len(self.locations), "perplexity must be smaller than the number of locations"
+        if pca_components is not None:
+            pca_components = min(pca_components, *self.features.shape)
+        return {'perplexity': perplexity, 'pca_components': pca_components,
+                'n_components': n_components, 'random_state': random_state}
+
+    def _key(self, kind, params):
+        params = json.dumps(params, sort_keys=True)
+        return hashlib.sha1((self._data_hash + kind + params).encode()).hexdigest()
+
+    def _cached(self, kind, params, compute):
+        """ Returns compute() and, if there is a cache_dir, stores it there under
+            the hash of the data and params.
+        """
+        if self.cache_dir is None:
+            return compute()
+        path = os.path.join(self.cache_dir, kind + '_' + self._key(kind, params) + '.npy')
+        if os.path.isfile(path):
+            return np.load(path)
+        result = compute()
+        np.save(path, result)
+        return result
+
+
+class _TSNE_Embedding():
+    """ A picklable deferred t-SNE embedding, so joblib can ship it to workers.
+    """
+
+    def __init__(self, features, params):
+        self.features = features
+        self.params = params
+
+    def __call__(self):
+        data = self.features
+        if self.params['pca_components'] is not None:
+            data = PCA(n_components=self.params['pca_components'],
+                       random_state=self.params['random_state']).fit_transform(data)
+        tsne = TSNE(n_components=self.params['n_components'], perplexity=self.params['perplexity'],
+                    method='barnes_hut', init='pca', random_state=self.params['random_state'])
+        return preprocessing.scale(tsne.fit_transform(data).astype(float))
+
+
+def _fit_labels(data, algorithm, params, random_state):
+    assert algorithm in ALGORITHMS, "algorithm must be one of " + str(list(ALGORITHMS))
+    if algorithm == 'kmeans':
+        params = dict(params, random_state=random_state, n_init=10)
+    return ALGORITHMS[algorithm](**params).fit(data).labels_
+
+
+def _score(embedding, algorithm, params, n_stability, random_state):
+    labels = _fit_labels(embedding, algorithm, params, random_state)
+
+    # DBSCAN noise points don't belong to a cluster
+    clustered = labels != -1
+    n_found = len(set(labels[clustered]))
+    if 2 <= n_found < clustered.sum():
+        silhouette = silhouette_score(embedding[clustered], labels[clustered])
+    else:
+        silhouette = np.nan
+
+    stability = []
+    random = np.random.RandomState(random_state)
+    n_sample = int(0.8 * len(embedding))
+    for _ in range(n_stability):
+        sample = np.sort(random.choice(len(embedding), n_sample, replace=False))
+        sample_labels = _fit_labels(embedding[sample], algorithm, params, random_state)
+        stability.append(adjusted_rand_score(labels[sample], sample_labels))
+
+    return {'n_clusters_found': n_found,
+            'noise': int((~clustered).sum()),
+            'silhouette': silhouette,
+            'stability': np.mean(stability) if stability else np.nan}
@@ -0,0 +1,96 @@
+import pandas as pd
+import numpy as np
+import pytest
+
+from threading import Barrier, Lock
+
+
+AGES = [0.5, 1.0, 2.0]
+CATEGORIES = ['cat1', 'cat2', 'cat3', 'cat4']
+
+
+class LocalGBD():
+    """ Stands in for vivarium_gbd_access.gbd. It records its covariate
+        queries and the peak number of them in flight. With parties set, every
+        query waits until that many are running at once.
+    """
+
+    locations = pd.DataFrame({'location_name': ['Kenya', 'Nigeria'], 'location_id': [180, 214]})
+
+    def __init__(self, parties: int=None):
+        self.barrier = Barrier(parties, timeout=10) if parties else None
+        self.calls = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = Lock()
+
+    def get_location_ids(self):
+        return self.locations
+
+    def get_covariate_estimates(self, covariate_ids, location_ids):
+        with self._lock:
+            self.calls.append((covariate_ids, location_ids))
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if self.barrier is not None:
+            self.barrier.wait()
+        with self._lock:
+            self.in_flight -= 1
+        index = pd.MultiIndex.from_product([np.atleast_1d(location_ids), [2015, 2016, 2017]],
+                                           names=['location_id', 'year_id'])
+        table = index.to_frame(index=False)
+        table.insert(0, 'covariate_id', covariate_ids[0])
+        table['mean_value'] = covariate_ids[0] + table.location_id / 1000 + table.year_id / 10000
+        return table
+
+
+def write_artifact(path, n_draws: int=200):
+    """ Writes a small synthetic BFP artifact for Kenya. The same arguments
+        always write the same data.
+    """
+    random = np.random.RandomState(0)
+    path = str(path)
+    index = pd.MultiIndex.from_product([AGES, ['Both'], [2016], range(n_draws)], names=['age', 'sex', 'year', 'draw'])
+    frame = index.to_frame(index=False)
+
+    pd.DataFrame({'location': ['Kenya']}).to_hdf(path, key='/dimensions/full_space', format='table')
+    pd.DataFrame({'age': AGES, 'sex': 'Both', 'year': 2016,
+                  'population': [1000.0, 2000.0, 3000.0]}).to_hdf(path, key='/population/structure', format='table')
+    pd.DataFrame({'year': [2015, 2016], 'sex': 'Both', 'mean_value': [100.0, 110.0],
+                  'lower_value': [90.0, 95.0], 'upper_value': [110.0, 125.0]}).to_hdf(
+        path, key='/covariate/live_births_by_sex/estimate', format='table')
+
+    deaths = frame.assign(value=10.0)
+    deaths.to_hdf(path, key='/cause/all_causes/death', format='table', data_columns=True)
+
+    exposure = pd.concat([frame.assign(parameter=cat) for cat in CATEGORIES], ignore_index=True)
+    shares = random.dirichlet([1, 2, 3, 14], len(frame))
+    exposure['value'] = shares.T.ravel()
+    exposure.to_hdf(path, key='/risk_factor/child_wasting/exposure', format='table', data_columns=True)
+
+    relative_risk = pd.concat([frame.assign(parameter=cat, cause='diarrheal_diseases') for cat in CATEGORIES],
+                              ignore_index=True)
+    means = np.repeat([4.0, 2.5, 1.5, 1.0], len(frame))
+    relative_risk['value'] = np.where(means > 1, means + random.normal(0, 0.3, len(means)), 1.0)
+    relative_risk.to_hdf(path, key='/risk_factor/child_wasting/relative_risk', format='table', data_columns=True)
+
+    # a table with fewer draws, in table and in fixed format
+    few_draws = pd.DataFrame({'draw': range(50), 'value': 1.0})
+    few_draws.to_hdf(path, key='/cause/measles/incidence', format='table', data_columns=True)
+    few_draws.to_hdf(path, key='/cause/measles/prevalence')
+    return path
+
+
+@pytest.fixture
+def make_artifact(tmp_path):
+    """ Returns a function writing a synthetic artifact with the given name
+        into tmp_path, see write_artifact.
+    """
+    def make(name: str='bfp.hdf', n_draws: int=200):
+        return write_artifact(tmp_path / name, n_draws)
+    return make
+
+
+@pytest.fixture
+def local_gbd():
+    return LocalGBD()
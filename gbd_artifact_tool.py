@@ -1,21 +1,121 @@
 from artifact_tool import *
 from gbd_mapping import covariates
 
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch_covariates(covariate_ids: dict, location_ids: list, year_ids: list=None, backend=gbd, max_workers: int=16):
+    """ Fetches covariate estimates for several covariates and locations
+        and returns them as one table. Each covariate is one query for all of
+        the locations, and the queries run concurrently.
+
+    Parameters
+    ----------
+    covariate_ids:
+        A dict mapping covariate names to their GBD ids
+    location_ids:
+        A list of GBD location ids
+    year_ids:
+        If given, only estimates for these years are returned. A backend whose
+        get_covariate_estimates takes a year_id or year_ids argument gets the
+        filter with the query. vivarium_gbd_access.gbd doesn't, so with it the
+        filter is applied to each result as it arrives.
+    backend:
+        Anything with a get_covariate_estimates(covariate_ids, location_ids)
+        function, vivarium_gbd_access.gbd by default.
+    max_workers:
+        The number of queries to run at once
+
+    Returns
+    -------
+    A table with the estimates of every covariate and location and a
+    "covariate" column holding the covariate name.
+    """
+    year_argument = _year_argument(backend.get_covariate_estimates)
+
+    def fetch(name):
+        kwargs = {year_argument: list(year_ids)} if year_ids is not None and year_argument else {}
+        table = backend.get_covariate_estimates([covariate_ids[name]], list(location_ids), **kwargs)
+        if year_ids is not None and not year_argument:
+            table = table[table.year_id.isin(year_ids)]
+        table = table.copy()
+        table['covariate'] = name
+        return table
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tables = list(executor.map(fetch, covariate_ids))
+    return pd.concat(tables, ignore_index=True)
+
+
+def covariate_ids(names: list):
+    """ Returns a dict mapping the given covariate names to their GBD ids.
+    """
+    covars = covariates.to_dict()
+    assert all([name in covars for name in names]), "unknown covariate name"
+    return {name: covars[name]['gbd_id'] for name in names}
+
+
+def _year_argument(func):
+    """ Returns the name of the year filter argument of func, if it has one.
+    """
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return None
+    for name in ['year_ids', 'year_id']:
+        if name in parameters:
+            return name
+    return None
+
 
 class GBD_ArtifactTool(ArtifactTool):
 
-    def __init__(self, path):
+    def __init__(self, path, backend=gbd):
+        """
+        Parameters
+        ----------
+        path:
+            The path to the artifact
+        backend:
+            The GBD backend locations and covariates are queried from,
+            vivarium_gbd_access.gbd by default. Tests pass a local stand-in.
+        """
         super().__init__(path)
+        self._backend = backend
         self.covariates = self._create_covariates()
         self.locations = self._create_locations()
 
     def _create_covariates(self):
         covars = covariates.to_dict()
-        covars = {c: partial(gbd.get_covariate_estimates, [covars[c]['gbd_id']]) for c in covars}
+        covars = {c: partial(self._backend.get_covariate_estimates, [covars[c]['gbd_id']]) for c in covars}
         return SimpleNamespace(**covars)
 
+    def get_covariates(self, names: list, location_ids: list, year_ids: list=None, max_workers: int=16,
+                       backend=None):
+        """ Fetches several covariates for several locations concurrently.
+            See fetch_covariates.
+
+        Parameters
+        ----------
+        names:
+            Covariate names, as used in the covariates namespace
+        location_ids:
+            A list of GBD location ids
+        year_ids:
+            An optional list of years to restrict the estimates to
+        backend:
+            The GBD backend to query, the one the tool was created with by default
+
+        Returns
+        -------
+        One table of estimates with a "covariate" column holding the covariate name.
+        """
+        return fetch_covariates(covariate_ids(names), location_ids, year_ids,
+                                backend=backend or self._backend, max_workers=max_workers)
+
     def _create_locations(self):
-        location_table = gbd.get_location_ids()
+        location_table = self._backend.get_location_ids()
         location_map = dict(zip(location_table.location_name, location_table.location_id))
         return SimpleNamespace(**location_map)
 
@@ -32,11 +132,13 @@ class GBD_ArtifactTool(ArtifactTool):
 
         Returns
         -------
-        A table that summarizes key statistical values for a specific column
+        A table that summarizes key statistical values for a specific column. In
+        preview mode each statistic gets a matching "_se" column.
         """
         assert "draw" in table.columns, "Table does not have a column named draw"
 
-        drawless_table = table.query('draw == 0')
+        # draw 0 is not necessarily read in preview mode
+        drawless_table = table[table.draw == table.draw.min()]
 
         # create identifiers for each row, independent of draws
         columns = drawless_table.columns.tolist()
@@ -61,6 +163,11 @@ class GBD_ArtifactTool(ArtifactTool):
         result_df[val_col + "_mean"] = [value_df[col].values.mean() for col in identifiers]
         result_df['lower 2.5'] = [np.percentile(value_df[col].values, 2.5) for col in identifiers]
         result_df['upper 97.5'] = [np.percentile(value_df[col].values, 97.5) for col in identifiers]
+        if self.in_preview:
+            mean_se, lower_se, upper_se = self._draw_errors(values)
+            result_df[val_col + "_mean_se"] = mean_se
+            result_df['lower 2.5_se'] = lower_se
+            result_df['upper 97.5_se'] = upper_se
         result_df = result_df.reset_index(drop=True)
 
         return result_df
@@ -1,6 +1,6 @@
 import pandas as pd
 import datetime
-from bfp_artifact_tool import BFP_ArtifactTool
+from bfp_artifact_tool import BFP_ArtifactTool, covariate_ids, fetch_covariates
 import glob
 
 
@@ -14,6 +14,7 @@ artifact_paths.remove('/share/scratch/users/abie/bfp_nigeria.hdf.hdf')
 print(artifact_paths)
 
 country_dict = {}
+location_ids = {}
 for path in artifact_paths:
     print(str(datetime.datetime.now()) + ' -- ' + str(path))
     at = BFP_ArtifactTool(path)
@@ -41,21 +42,30 @@ for path in artifact_paths:
     for i, key in enumerate("incidence/" + incidence.cause):
         stat_dict[key] = incidence.incidence.loc[i]
 
-    ##### Covariates
-    stat_dict['HAQI'] = at.covariates.healthcare_access_and_quality_index().query('year_id == 2016').mean_value.values[0]
-    stat_dict['ANC1'] = at.covariates.antenatal_care_1_visit_coverage_proportion().query('year_id == 2016').mean_value.values[0]
-    stat_dict['ANC4'] = at.covariates.antenatal_care_4_visits_coverage_proportion().query('year_id == 2016').mean_value.values[0]
-    stat_dict['urbancity'] = at.covariates.urbanicity().query('year_id == 2016').mean_value.values[0]
-    stat_dict['in facility birth rate'] = at.covariates.in_facility_delivery_proportion().query('year_id == 2016').mean_value.values[0]
-    stat_dict['LDI'] = at.covariates.ldi_income_per_capita().query('year_id == 2016').mean_value.values[0]
-    stat_dict['SDI'] = at.covariates.socio_demographic_index().query('year_id == 2016').mean_value.values[0]
-    stat_dict['ten year lag distributed energy per capita'] = at.covariates.ten_year_lag_distributed_energy_per_capita().query('year_id == 2016').mean_value.values[0]
-    stat_dict['SBA'] = at.covariates.skilled_birth_attendance_proportion().query('year_id == 2016').mean_value.values[0]
-    stat_dict['no access to handwashing facility'] = at.covariates.no_access_to_handwashing_facility().query('year_id == 2016').mean_value.values[0]
-    stat_dict['education years per capita'] = at.covariates.education_years_per_capita().query('year_id == 2016').mean_value.values[0]
-
     # Save the dictionary
     country_dict[at.location] = stat_dict
+    location_ids[at.location] = at.location_id
     del(at)
+
+##### Covariates
+# fetch every covariate for every country at once
+covariate_names = {'HAQI': 'healthcare_access_and_quality_index',
+                   'ANC1': 'antenatal_care_1_visit_coverage_proportion',
+                   'ANC4': 'antenatal_care_4_visits_coverage_proportion',
+                   'urbancity': 'urbanicity',
+                   'in facility birth rate': 'in_facility_delivery_proportion',
+                   'LDI': 'ldi_income_per_capita',
+                   'SDI': 'socio_demographic_index',
+                   'ten year lag distributed energy per capita': 'ten_year_lag_distributed_energy_per_capita',
+                   'SBA': 'skilled_birth_attendance_proportion',
+                   'no access to handwashing facility': 'no_access_to_handwashing_facility',
+                   'education years per capita': 'education_years_per_capita'}
+print(str(datetime.datetime.now()) + ' -- covariates')
+covars = fetch_covariates(covariate_ids(list(covariate_names.values())), list(location_ids.values()), year_ids=[2016])
+for location, location_id in location_ids.items():
+    location_covars = covars[covars.location_id == location_id]
+    for key, name in covariate_names.items():
+        country_dict[location][key] = location_covars[location_covars.covariate == name].mean_value.values[0]
+
 table = pd.DataFrame(country_dict)
 table.to_csv('table.csv')
@@ -0,0 +1,122 @@
+from artifact_diff import *
+
+
+DEATHS = '/cause/all_causes/death'
+BIRTHS = '/covariate/live_births_by_sex/estimate'
+
+def _change(path, key, change, **kwargs):
+    table = pd.read_hdf(path, key)
+    change(table)
+    table.to_hdf(path, key=key, **kwargs)
+
+def _diff(make_artifact, change=None, n_draws=10, **kwargs):
+    old = make_artifact('old.hdf', n_draws)
+    new = make_artifact('new.hdf', n_draws)
+    if change is not None:
+        change(new)
+    return ArtifactDiff(old, new, **kwargs)
+
+def test_identical_artifacts(make_artifact):
+    diff = _diff(make_artifact, chunksize=7)
+    assert diff.is_identical
+    assert len(diff.unchanged) == 8
+
+def test_changed_values(make_artifact):
+    def change(path):
+        def add(table):
+            table.loc[table.index[-1], 'value'] += 0.5
+        _change(path, DEATHS, add, format='table', data_columns=True)
+
+    diff = _diff(make_artifact, change, chunksize=7)
+    assert not diff.is_identical
+    changed = diff.changed.set_index('path').loc[DEATHS]
+    assert changed.chunks_changed == 1
+    assert abs(changed.max_abs_diff - 0.5) < 1e-9
+    # only the draw summary of age 2 moved
+    assert changed.rows_changed == 1
+    assert changed.columns_changed == ['value']
+    assert abs(changed.mean_delta - 0.5 / 10) < 1e-9
+    deltas = diff.summary_deltas[DEATHS]
+    assert abs(deltas.value_mean_delta.loc[(2.0, 'Both', 2016, 'value')] - 0.5 / 10) < 1e-9
+    assert (deltas.value_mean_delta != 0).sum() == 1
+
+def test_every_float_column_is_compared(make_artifact):
+    def change(path):
+        def lower(table):
+            table.loc[table.year == 2016, 'lower_value'] = 100.0
+        _change(path, BIRTHS, lower, format='table')
+
+    diff = _diff(make_artifact, change)
+    changed = diff.changed.set_index('path').loc[BIRTHS]
+    assert changed.rows_changed == 1
+    assert changed.columns_changed == ['lower_value']
+    assert changed.max_abs_diff == 5
+    assert changed.mean_delta == 5
+    deltas = diff.summary_deltas[BIRTHS]
+    assert len(deltas) == 2 * 3
+    assert deltas.value_mean_delta.loc[(2016, 'Both', 'lower_value')] == 5
+
+def test_percentiles_are_capped(make_artifact):
+    def change(path):
+        def add(table):
+            table['value'] += 1
+        _change(path, DEATHS, add, format='table', data_columns=True)
+
+    diff = _diff(make_artifact, change, max_summary_rows=0)
+    changed = diff.changed.set_index('path').loc[DEATHS]
+    assert changed.mean_delta == 1
+    assert np.isnan(changed.lower_delta) and np.isnan(changed.upper_delta)
+
+def test_added_and_schema_changes(make_artifact):
+    def change(path):
+        pd.DataFrame({'value': [1.0]}).to_hdf(path, key='/cause/measles/remission', format='table')
+        _change(path, '/cause/measles/incidence', lambda table: table.insert(0, 'age', 0.5),
+                format='table', data_columns=True)
+
+    diff = _diff(make_artifact, change)
+    assert diff.added == ['/cause/measles/remission']
+    assert list(diff.schema_changed) == ['/cause/measles/incidence']
+
+def test_nan_changes(make_artifact):
+    def change(path):
+        def nan(table):
+            table.loc[table.index[3], 'value'] = np.nan
+        _change(path, DEATHS, nan, format='table', data_columns=True)
+
+    diff = _diff(make_artifact, change)
+    changed = diff.changed.set_index('path').loc[DEATHS]
+    assert changed.nan_changed == 1
+    assert changed.max_abs_diff == 0
+
+def test_index_changes(make_artifact):
+    def change(path):
+        def shift(table):
+            table.index = table.index + 1
+        _change(path, '/cause/measles/prevalence', shift)
+
+    diff = _diff(make_artifact, change)
+    assert list(diff.changed.path) == ['/cause/measles/prevalence']
+
+def test_value_columns_per_node(make_artifact):
+    def change(path):
+        def more(table):
+            table.loc[table.year == 2016, 'mean_value'] = 115.0
+        _change(path, BIRTHS, more, format='table')
+        pd.Series([10.0, 25.0], name='births', index=[2015, 2016]).to_hdf(path, key='/covariate/births/estimate')
+
+    def write_series(path):
+        pd.Series([10.0, 20.0], name='births', index=[2015, 2016]).to_hdf(path, key='/covariate/births/estimate')
+
+    old = make_artifact('old.hdf', 10)
+    write_series(old)
+    new = make_artifact('new.hdf', 10)
+    change(new)
+
+    diff = ArtifactDiff(old, new, val_col={BIRTHS: 'mean_value'})
+    changed = diff.changed.set_index('path')
+    assert changed.columns_changed[BIRTHS] == ['mean_value']
+    assert changed.columns_changed['/covariate/births/estimate'] == ['births']
+    assert all(changed.mean_delta == 5)
+    assert all(changed.max_abs_diff == 5)
+    # lower_value and upper_value identify rows when they aren't value columns
+    assert len(diff.summary_deltas[BIRTHS]) == 2
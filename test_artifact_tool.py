@@ -46,3 +46,15 @@ def test_SEV_for_year_with_age_limit():
     for risk in at._risks:
         SEV = at.SEV_for_year_with_age_limit(risk, 2016, 0, 5)
         assert all(SEV.SEV >= 0) and all(SEV.SEV <= 1)
+
+def test_preview():
+    path = '/cause/all_causes/cause_specific_mortality'
+    at.preview(10)
+    try:
+        preview_draws = set(at._get_table(path).draw)
+        assert len(preview_draws) == 10
+        at.refine()
+        assert preview_draws < set(at._get_table(path).draw)
+    finally:
+        at.full()
+    assert at._get_table(path).draw.nunique() == at._hdf.get(path).draw.nunique()
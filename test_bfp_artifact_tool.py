@@ -0,0 +1,124 @@
+from bfp_artifact_tool import *
+from conftest import LocalGBD
+
+import pytest
+import warnings
+
+
+def _tool(path):
+    return BFP_ArtifactTool(path, backend=LocalGBD())
+
+def test_preview_draws_do_not_depend_on_read_order(make_artifact):
+    path = make_artifact(n_draws=1000)
+    first, second = _tool(path), _tool(path)
+    first.preview(10)
+    second.preview(10)
+
+    many = set(first._get_table('/cause/all_causes/death').draw)
+    few = set(first._get_table('/cause/measles/incidence').draw)
+    assert few == set(second._get_table('/cause/measles/incidence').draw)
+    assert many == set(second._get_table('/cause/all_causes/death').draw)
+    assert len(many) == 10 and len(few) == 10
+    assert max(many) > 100
+
+def test_preview_reads_the_same_rows_as_filtering(make_artifact):
+    at = _tool(make_artifact())
+    at.preview(20, seed=3)
+    table = at._get_table('/risk_factor/child_wasting/exposure')
+    full = at._hdf.get('/risk_factor/child_wasting/exposure')
+    assert table.equals(full[full.draw.isin(table.draw.unique())])
+    assert table.draw.nunique() == 20
+
+    assert not at.preview_full_reads
+
+    # fixed format tables are filtered after loading but pick the same draws
+    with pytest.warns(UserWarning, match='/cause/measles/prevalence'):
+        prevalence = at._get_table('/cause/measles/prevalence')
+    assert set(prevalence.draw) == set(at._get_table('/cause/measles/incidence').draw)
+    assert at.preview_full_reads == {'/cause/measles/prevalence'}
+    # the fallback is only reported once per node
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        at._get_table('/cause/measles/prevalence')
+
+def test_refine_and_seeds(make_artifact):
+    path = make_artifact()
+    at = _tool(path)
+    at.preview(10, seed=1)
+    draws = set(at._get_table('/cause/all_causes/death').draw)
+    at.refine()
+    refined = set(at._get_table('/cause/all_causes/death').draw)
+    assert len(refined) == 20 and draws < refined
+
+    other = _tool(path)
+    other.preview(10, seed=1)
+    assert set(other._get_table('/cause/all_causes/death').draw) == draws
+    other.preview(10, seed=2)
+    assert set(other._get_table('/cause/all_causes/death').draw) != draws
+
+    with pytest.raises(AssertionError):
+        at.refine(10)
+    at.full()
+    assert at._get_table('/cause/all_causes/death').draw.nunique() == 200
+
+def test_reduce_draws_standard_errors(make_artifact):
+    at = _tool(make_artifact())
+    at.preview(50)
+    table = at._get_table('/risk_factor/child_wasting/exposure')
+    reduced = at.reduce_draws(table)
+    for column in ['value_mean_se', 'lower_se', 'upper_se']:
+        assert all(reduced[column] > 0)
+
+    values = table[(table.age == 0.5) & (table.parameter == 'cat1')].value
+    row = reduced[(reduced.age == 0.5) & (reduced.parameter == 'cat1')]
+    assert np.isclose(row.value_mean_se.values[0], values.std() / np.sqrt(50))
+
+    at.full()
+    assert 'value_mean_se' not in at.reduce_draws(at._get_table('/risk_factor/child_wasting/exposure')).columns
+
+def test_weighted_se(make_artifact):
+    at = _tool(make_artifact())
+    table = pd.DataFrame({'group': ['a', 'a', 'b'], 'population': [1.0, 3.0, 2.0],
+                          'value_mean_se': [0.4, 0.2, 0.1]})
+    assert at._weighted_se(table) == [(0.4 + 0.6 + 0.2) / 6]
+    assert at._weighted_se(table, table.groupby(['group']).groups) == [1.0 / 4, 0.1]
+
+def test_deaths_do_not_depend_on_draw_count(make_artifact):
+    at = _tool(make_artifact())
+    deaths = at.deaths_for_year_with_age_limit(2016, 0, 5)
+    at.preview(10)
+    assert at.deaths_for_year_with_age_limit(2016, 0, 5) == deaths
+
+def test_statistics_have_standard_errors_in_preview(make_artifact):
+    at = _tool(make_artifact())
+    full_sev = at.SEV_for_year_with_age_limit('child_wasting', 2016)
+    full_paf = at.PAF_for_year_with_age_limit('child_wasting', 2016)
+    assert 'SEV_se' not in full_sev.columns
+
+    at.preview(50)
+    exposure = at.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5)
+    relative_risk = at.relative_risk_by_year_with_age_limit('child_wasting', 2016, 0, 5)
+    for column in ['exposure_rate_se', 'exposure_rate_lower_se', 'exposure_rate_upper_se']:
+        assert all(exposure[column] > 0)
+    for column in ['relative_risk_se', 'relative_risk_lower_se', 'relative_risk_upper_se']:
+        assert all(relative_risk[column] >= 0)
+
+    sev = at.SEV_for_year_with_age_limit('child_wasting', 2016)
+    paf = at.PAF_for_year_with_age_limit('child_wasting', 2016)
+    assert all(sev.SEV_se > 0) and all(paf.PAF_se > 0)
+    # the full values lie within a few standard errors of the preview
+    assert all(abs(sev.SEV - full_sev.SEV) < 4 * sev.SEV_se)
+    assert all(abs(paf.PAF - full_paf.PAF) < 4 * paf.PAF_se)
+
+def test_caches_follow_the_preview_state(make_artifact):
+    path = make_artifact()
+    at, other = _tool(path), _tool(path)
+    full = at.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5)
+    other_full = other.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5)
+
+    at.preview(10)
+    preview = at.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5)
+    assert 'exposure_rate_se' in preview.columns
+    at.full()
+    assert at.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5) is full
+    assert other.exposure_rates_by_year_with_age_limit('child_wasting', 2016, 0, 5) is other_full
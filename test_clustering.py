@@ -0,0 +1,41 @@
+from clustering import *
+
+
+def _feature_table(n_locations=40, n_features=6):
+    random = np.random.RandomState(0)
+    centers = random.normal(0, 10, (4, n_features))
+    data = centers[np.arange(n_locations) % 4] + random.normal(0, 0.5, (n_locations, n_features))
+    features = ['population'] + ['feature ' + str(i) for i in range(1, n_features)]
+    data[:, 0] = np.exp(data[:, 0] / 10) * 1e6
+    return pd.DataFrame(data.T, index=features, columns=['location ' + str(i) for i in range(n_locations)])
+
+def test_features_are_standardized():
+    clustering = CountryClustering(_feature_table())
+    assert clustering.features.shape == (40, 6)
+    assert np.allclose(clustering.features.mean(axis=0), 0)
+    assert np.allclose(clustering.features.std(axis=0), 1)
+
+def test_embeddings_are_cached(tmp_path):
+    clustering = CountryClustering(_feature_table(), cache_dir=str(tmp_path))
+    embedding = clustering.embed(perplexity=5)
+    assert embedding is clustering.embed(perplexity=5)
+    assert len(list(tmp_path.glob('embedding_*.npy'))) == 1
+
+    reloaded = CountryClustering(_feature_table(), cache_dir=str(tmp_path))
+    assert np.array_equal(embedding, reloaded.embed(perplexity=5))
+
+def test_sweep():
+    clustering = CountryClustering(_feature_table(), n_jobs=2)
+    scores = clustering.sweep(perplexities=[5, 10], algorithms=['agglomerative', 'kmeans', 'dbscan'],
+                              n_clusters=[3, 4], eps=[0.5], pca_components=[None, 3], n_stability=3)
+    assert len(scores) == 2 * 2 * (2 + 2 + 1)
+    best = scores.sort_values(by=['silhouette']).iloc[-1]
+    assert best.n_clusters_found == 4
+    assert all(scores.stability.dropna() <= 1)
+
+def test_many_locations():
+    clustering = CountryClustering(_feature_table(n_locations=1000, n_features=20), n_jobs=1)
+    scores = clustering.sweep(perplexities=[30], n_clusters=[4], n_stability=1)
+    assert clustering.embed(perplexity=30).shape == (1000, 2)
+    assert scores.n_clusters_found[0] == 4
+    assert scores.stability[0] > 0.9
@@ -0,0 +1,59 @@
+from bfp_artifact_tool import *
+from conftest import LocalGBD
+
+
+class _LocalGBDWithYears(LocalGBD):
+
+    def get_covariate_estimates(self, covariate_ids, location_ids, year_id=None):
+        self.year_id = year_id
+        table = super().get_covariate_estimates(covariate_ids, location_ids)
+        return table[table.year_id.isin(year_id)]
+
+def test_fetch_covariates(local_gbd):
+    ids = {'urbanicity': 1, 'socio_demographic_index': 2, 'ldi_income_per_capita': 3}
+    table = fetch_covariates(ids, [10, 20], year_ids=[2016], backend=local_gbd)
+    # one query per covariate for all locations
+    assert sorted(local_gbd.calls) == [([1], [10, 20]), ([2], [10, 20]), ([3], [10, 20])]
+    assert len(table) == 6
+    assert set(table.year_id) == {2016}
+    for name, covariate_id in ids.items():
+        assert set(table[table.covariate == name].covariate_id) == {covariate_id}
+        assert set(table[table.covariate == name].location_id) == {10, 20}
+
+def test_fetch_covariates_filters_years_in_backend():
+    backend = _LocalGBDWithYears()
+    table = fetch_covariates({'urbanicity': 1}, [10], year_ids=[2016, 2017], backend=backend)
+    assert backend.year_id == [2016, 2017]
+    assert set(table.year_id) == {2016, 2017}
+
+def test_fetch_covariates_is_concurrent():
+    # every query blocks until all eleven are in flight, so a serial fetch
+    # would break the barrier
+    backend = LocalGBD(parties=11)
+    ids = {str(i): i for i in range(11)}
+    table = fetch_covariates(ids, [10, 20], backend=backend, max_workers=11)
+    assert backend.peak_in_flight == 11
+    assert len(table) == 11 * 2 * 3
+
+def test_gbd_artifact_tool_get_covariates(make_artifact, local_gbd):
+    at = GBD_ArtifactTool(make_artifact(), backend=local_gbd)
+    assert at.locations.Kenya == 180
+    names = ['urbanicity', 'socio_demographic_index']
+    table = at.get_covariates(names, [10, 20], year_ids=[2016])
+
+    covars = covariates.to_dict()
+    assert sorted(local_gbd.calls) == sorted([([covars[name]['gbd_id']], [10, 20]) for name in names])
+    for name in names:
+        assert set(table[table.covariate == name].covariate_id) == {covars[name]['gbd_id']}
+    assert set(table.year_id) == {2016}
+
+def test_bfp_artifact_tool_get_covariates_defaults_to_its_location(make_artifact, local_gbd):
+    at = BFP_ArtifactTool(make_artifact(), backend=local_gbd)
+    assert at.location == 'Kenya' and at.location_id == 180
+    table = at.get_covariates(['urbanicity'], year_ids=[2016])
+    assert [location_ids for _, location_ids in local_gbd.calls] == [[180]]
+    assert list(table.location_id) == [180]
+
+    other = LocalGBD()
+    at.get_covariates(['urbanicity'], [10, 20], backend=other)
+    assert [location_ids for _, location_ids in other.calls] == [[10, 20]]